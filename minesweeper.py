@@ -1,6 +1,10 @@
-import itertools
 import random
 
+from collections import deque
+
+# Offsets of the eight cells around a cell
+NEIGHBORS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)]
+
 
 class Minesweeper():
     """
@@ -22,13 +26,19 @@ class Minesweeper():
                 row.append(False)
             self.board.append(row)
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines randomly, drawing distinct cells at once
+        for cell in random.sample(range(height * width), mines):
+            i, j = divmod(cell, width)
+            self.mines.add((i, j))
+            self.board[i][j] = True
+
+        # Count the mines around every cell once, since the board never changes
+        self.counts = [[0] * self.width for _ in range(self.height)]
+        for i, j in self.mines:
+            for di, dj in NEIGHBORS:
+                ni, nj = i + di, j + dj
+                if 0 <= ni < self.height and 0 <= nj < self.width:
+                    self.counts[ni][nj] += 1
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -58,24 +68,8 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        i, j = cell
+        return self.counts[i][j]
 
     def won(self):
         """
@@ -140,6 +134,25 @@ class Sentence():
         if cell in self.cells:
             self.cells.remove(cell)
 
+    def mark_mines(self, cells):
+        """
+        Updates internal knowledge representation given the fact that
+        all of `cells` are known to be mines.
+        """
+        # Removing every mine of the sentence at once, and changing the count by their number.
+        mines = self.cells.intersection(cells)
+        if mines:
+            self.cells -= mines
+            self.count -= len(mines)
+
+    def mark_safes(self, cells):
+        """
+        Updates internal knowledge representation given the fact that
+        all of `cells` are known to be safe.
+        """
+        # Removing every safe cell of the sentence at once.
+        self.cells.difference_update(cells)
+
 
 class MinesweeperAI():
     """
@@ -152,6 +165,9 @@ class MinesweeperAI():
         self.height = height
         self.width = width
 
+        # Every cell of the board
+        self.all_cells = frozenset((i, j) for i in range(height) for j in range(width))
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -162,23 +178,188 @@ class MinesweeperAI():
         # List of sentences about the game known to be true
         self.knowledge = []
 
+        # Indexes of the knowledge base: the sentences keyed by their id(), the
+        # bitmask of the cells of every sentence, and the keys of the sentences
+        # by cell and by bitmask of cells
+        self.sentences = dict()
+        self.masks = dict()
+        self.cell_sentences = dict()
+        self.mask_sentences = dict()
+
+        # Keys of sentences that have to be checked for new inferences
+        self.pending = deque()
+
+    def cells_mask(self, cells):
+        """
+        Returns an integer with one bit set for every cell in `cells`,
+        so that sets of cells can be compared with integer operations.
+        """
+        mask = 0
+        for i, j in cells:
+            mask |= 1 << (i * self.width + j)
+        return mask
+
+    def mask_cells(self, mask):
+        """
+        Returns the set of cells whose bits are set in `mask`.
+        """
+        cells = set()
+        while mask:
+            bit = mask & -mask
+            cells.add(divmod(bit.bit_length() - 1, self.width))
+            mask ^= bit
+        return cells
+
+    def index_knowledge(self):
+        """
+        Brings the indexes in step with self.knowledge. Sentences added to
+        the knowledge base since it was last indexed, or changed through
+        their own mark methods, are indexed again and scheduled for
+        inference, and sentences no longer in it leave the indexes.
+        """
+        keys = set()
+        for sentence in self.knowledge:
+            key = id(sentence)
+            keys.add(key)
+            if key in self.sentences and self.masks[key].bit_count() != len(sentence.cells):
+                self.remove_sentence(key)
+            if key not in self.sentences:
+                self.add_sentence(sentence)
+
+        for key in set(self.sentences) - keys:
+            self.remove_sentence(key)
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the indexes of the knowledge base, unless it
+        is empty or already known, and schedules it for inference.
+        """
+        mask = self.cells_mask(sentence.cells)
+        if not mask or mask in self.mask_sentences:
+            return
+
+        key = id(sentence)
+        self.sentences[key] = sentence
+        self.masks[key] = mask
+        self.mask_sentences[mask] = key
+        for cell in sentence.cells:
+            self.cell_sentences.setdefault(cell, set()).add(key)
+        self.pending.append(key)
+
+    def remove_sentence(self, key):
+        """
+        Removes a sentence from the indexes, so that it leaves
+        the knowledge base at the end of infer.
+        """
+        del self.sentences[key]
+        mask = self.masks.pop(key)
+        if self.mask_sentences.get(mask) == key:
+            del self.mask_sentences[mask]
+
+        # Using the indexed cells, since the sentence may have changed since it was indexed.
+        for cell in self.mask_cells(mask):
+            if cell in self.cell_sentences:
+                self.cell_sentences[cell].discard(key)
+
+    def propagate(self, cells, mine):
+        """
+        Marks the cells as mines if `mine` is true or as safe otherwise,
+        updating only the sentences that contain them and scheduling
+        those sentences for inference.
+        """
+        if mine:
+            self.mines.update(cells)
+        else:
+            self.safes.update(cells)
+
+        # Finding the sentences that contain any of the cells, which leave the index.
+        keys = set()
+        for cell in cells:
+            keys.update(self.cell_sentences.pop(cell, ()))
+
+        cells_mask = self.cells_mask(cells)
+        for key in keys:
+            sentence = self.sentences[key]
+            if mine:
+                sentence.mark_mines(cells)
+            else:
+                sentence.mark_safes(cells)
+
+            # Removing the sentence once it is empty or the same as another sentence,
+            # otherwise keeping the bitmask index in step with the sentence's cells.
+            mask = self.masks[key] & ~cells_mask
+            if not mask or mask in self.mask_sentences:
+                self.remove_sentence(key)
+                continue
+
+            del self.mask_sentences[self.masks[key]]
+            self.masks[key] = mask
+            self.mask_sentences[mask] = key
+            self.pending.append(key)
+
+    def infer(self):
+        """
+        Checks every new or changed sentence until no sentence is left
+        to check, marking the cells that can be concluded as mines or
+        safes and adding the sentences that can be inferred.
+        """
+        while self.pending:
+            key = self.pending.popleft()
+
+            # Skipping sentences that left the knowledge base after being scheduled.
+            sentence = self.sentences.get(key)
+            if sentence is None:
+                continue
+            
+            # Marking the cells of the sentence as mines or safes, if that can be concluded.
+            # The cells are copied, since marking them removes them from the sentence.
+            if sentence.known_mines():
+                self.propagate(set(sentence.known_mines()), True)
+                continue
+            if sentence.known_safes():
+                self.propagate(set(sentence.known_safes()), False)
+                continue
+            
+            mask = self.masks[key]
+
+            # Creating new sentences from the sentences this sentence is a subset of, which
+            # are the sentences found in the index of every one of the sentence's cells.
+            supersets = set.intersection(*(self.cell_sentences[sentence_cell] for sentence_cell in sentence.cells))
+            for other in supersets:
+                if other != key:
+                    superset = self.sentences[other]
+                    if self.masks[other] & ~mask not in self.mask_sentences:
+                        self.add_sentence(Sentence(superset.cells - sentence.cells, superset.count - sentence.count))
+
+            # Creating new sentences from the sentences that are a subset of this sentence.
+            overlapping = set().union(*(self.cell_sentences[sentence_cell] for sentence_cell in sentence.cells))
+            for other in overlapping:
+                if other != key and not self.masks[other] & ~mask:
+                    subset = self.sentences[other]
+                    if mask & ~self.masks[other] not in self.mask_sentences:
+                        self.add_sentence(Sentence(sentence.cells - subset.cells, sentence.count - subset.count))
+        
+        # Keeping exactly the indexed sentences in the knowledge base. This removes the sentences
+        # that became empty or duplicates when known_safes or known_mines changed them.
+        self.knowledge = list(self.sentences.values())
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
-        self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.index_knowledge()
+        self.propagate({cell}, True)
+        self.infer()
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
-        self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self.index_knowledge()
+        self.propagate({cell}, False)
+        self.infer()
 
     def add_knowledge(self, cell, count):
         """
@@ -197,70 +378,36 @@ class MinesweeperAI():
         """
         # 1)
         self.moves_made.add(cell)
+        self.index_knowledge()
         
         # 2)
-        self.mark_safe(cell)
+        self.propagate({cell}, False)
         
         # 3)
         # Initializing a set to keep track of new sentence cells.
         neighbors = set()
         
         # Creating the cells of the new sentence.
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-                # Checking if the cell is already a known safe.
-                if (i, j) in self.safes:
-                    continue
-                
-                # Checking if the cell is already a known mine.
-                if (i, j) in self.mines:
-                    count -= 1
-                    continue
-                
-                if i in range(0, self.height) and j in range(0, self.width):
-                    neighbors.add((i, j))
-        
-        # Creating new sentence and adding it to the knowledge base.
-        self.knowledge.append(Sentence(neighbors, count))
-        
-        # Creating a new_data variable to keep track of new sentences and new safe cells or mines.
-        new_data = True
-        while new_data:
-            # Setting new_data as False until new information appears.
-            new_data = False
+        for di, dj in NEIGHBORS:
+            i, j = cell[0] + di, cell[1] + dj
             
-            # 4)
-            # Getting additional info from the sentences in the knowledge base.
-            mine_cells = set()
-            safe_cells = set()
-            for sentence in self.knowledge:
-                mine_cells = mine_cells.union(sentence.known_mines())
-                safe_cells = safe_cells.union(sentence.known_safes())
+            # Checking if the cell is already a known safe.
+            if (i, j) in self.safes:
+                continue
             
-            # Marking new mine_cells or safe_cells, if any.
-            if mine_cells:
-                for mine in mine_cells:
-                    self.mark_mine(mine)
-                new_data = True
-            if safe_cells:
-                for safe in safe_cells:
-                    self.mark_safe(safe)
-                new_data = True
+            # Checking if the cell is already a known mine.
+            if (i, j) in self.mines:
+                count -= 1
+                continue
             
-            # Removing empty sentences from the knowledge base. Empty sentences
-            # are created when known_safes or known_mines make changes to the sentences.
-            self.knowledge = [sentence for sentence in self.knowledge if sentence != Sentence(set(), 0)]
-            
-            # 5)
-            # Looping through every combination of sentences and creating new sentences.
-            for sentence_1, sentence_2 in itertools.permutations(self.knowledge, 2):
-                if sentence_1.cells.issubset(sentence_2.cells):
-                    new_sentence = Sentence(sentence_2.cells - sentence_1.cells, sentence_2.count - sentence_1.count)
-                    
-                    # Checking if the new sentence is already in the knowledge base.
-                    if new_sentence not in self.knowledge:
-                        self.knowledge.append(new_sentence)
-                        new_data = True
+            if 0 <= i < self.height and 0 <= j < self.width:
+                neighbors.add((i, j))
+        
+        # Creating new sentence and adding it to the knowledge base.
+        self.add_sentence(Sentence(neighbors, count))
+        
+        # 4) and 5)
+        self.infer()
 
     def make_safe_move(self):
         """
@@ -285,11 +432,9 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        while True:
-            # Generating the next random move.
-            i = random.randrange(self.height)
-            j = random.randrange(self.width)
-            
-            # Checking if the move has already been made or if it is a known mine.
-            if (i, j) not in self.moves_made and (i, j) not in self.mines:
-                return (i, j)
+        # Creating a set of the allowed moves, then making a random choice.
+        random_moves = self.all_cells - self.moves_made - self.mines
+        if random_moves:
+            return random.choice(tuple(random_moves))
+
+        return None
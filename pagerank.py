@@ -1,3 +1,5 @@
+import bisect
+import itertools
 import os
 import random
 import re
@@ -5,6 +7,7 @@ import sys
 
 DAMPING = 0.85
 SAMPLES = 10000
+LINK_PATTERN = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
 
 
 def main():
@@ -33,14 +36,15 @@ def crawl(directory):
     for filename in os.listdir(directory):
         if not filename.endswith(".html"):
             continue
-        with open(os.path.join(directory, filename)) as f:
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
             contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+            links = LINK_PATTERN.findall(contents)
+            pages[filename] = frozenset(links) - {filename}
 
-    # Only include links to other pages in the corpus
+    # Only include links to other pages in the corpus, frozen since
+    # the links of a page never change once the corpus is crawled
     for filename in pages:
-        pages[filename] = set(
+        pages[filename] = frozenset(
             link for link in pages[filename]
             if link in pages
         )
@@ -57,21 +61,21 @@ def transition_model(corpus, page, damping_factor):
     linked to by `page`. With probability `1 - damping_factor`, choose
     a link at random chosen from all pages in the corpus.
     """
-    # Initialize a dictionary for the probability distribution.
-    probability_distribution = {page_key: float(0) for page_key in corpus}
-
-    # Filling the dictionary with correct probabilities according to
-    # the number of links in a page and according to current page.
-    if len(corpus[page]):
-        for page_link in corpus:
-            probability_distribution[page_link] += (1 - damping_factor) / len(corpus)
-        
-        for page_link in corpus[page]:
-            probability_distribution[page_link] += damping_factor / len(corpus[page])
-                 
+    # Looking up the number of pages and the links of the current page once.
+    N = len(corpus)
+    links = corpus[page]
+
+    # Initializing the dictionary for the probability distribution with the correct
+    # probabilities according to the number of links in a page and according to current page.
+    if links:
+        probability_distribution = dict.fromkeys(corpus, (1 - damping_factor) / N)
+
+        link_probability = damping_factor / len(links)
+        for page_link in links:
+            probability_distribution[page_link] += link_probability
+
     else:
-        for page_link in corpus:
-            probability_distribution[page_link] += 1 / len(corpus)
+        probability_distribution = dict.fromkeys(corpus, 1 / N)
 
     return probability_distribution
 
@@ -85,21 +89,35 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    # Initializing a dictionary for the PageRank.
-    pagerank = {page_key: float(0) for page_key in corpus}
-
-    # Choosing a random page for first page, and updating dictionary.
-    current_page = random.choice(list(pagerank))
-    pagerank[current_page] += 1
-
-    # Finding the rest of the random states.
+    # Indexing the pages with integers, so that the walk only moves between list positions.
+    pages = tuple(corpus)
+    N = len(pages)
+
+    # The probability distribution depends only on the current page, so
+    # calculating it once for every page in the corpus, as cumulative weights
+    # in the order of `pages`, which is also the order of its keys.
+    distributions = []
+    for page in pages:
+        next_page_probability = transition_model(corpus, page, damping_factor)
+        cum_weights = tuple(itertools.accumulate(next_page_probability.values()))
+        distributions.append((cum_weights, cum_weights[-1]))
+
+    # Initializing a list for the number of visits of each page.
+    visits = [0] * N
+
+    # Choosing a random page for first page, and updating the visits.
+    current_page = random.randrange(N)
+    visits[current_page] += 1
+
+    # Finding the rest of the random states, by locating a uniform draw
+    # in the cumulative weights of the current page.
     for i in range(1, n):
-        next_page_probability = transition_model(corpus, current_page, damping_factor)
-        current_page = random.choices(list(next_page_probability.keys()), list(next_page_probability.values()))[0]        
-        pagerank[current_page] += 1
+        cum_weights, total = distributions[current_page]
+        current_page = bisect.bisect(cum_weights, random.random() * total, 0, N - 1)
+        visits[current_page] += 1
 
-    # Divide each page's rank by n to calculate the estimated PageRank value.
-    pagerank = {key: (value / n) for key, value in pagerank.items()}
+    # Divide each page's visits by n to calculate the estimated PageRank value.
+    pagerank = {page: (visits[index] / n) for index, page in enumerate(pages)}
 
     return pagerank
 
@@ -116,38 +134,48 @@ def iterate_pagerank(corpus, damping_factor):
     # Initializing N = number of pages.
     N = len(corpus)
 
+    # Precomputing, for every page, the pages linking to it together with the
+    # share of rank each of them passes on, so that every iteration only walks
+    # the existing links. Pages without links are interpreted as having one
+    # link for every page in the corpus, so they are kept apart and their rank
+    # is spread evenly.
+    incoming = {page_key: [] for page_key in corpus}
+    dangling = []
+    for page_2 in corpus:
+        if corpus[page_2]:
+            share = 1 / len(corpus[page_2])
+            for page_1 in corpus[page_2]:
+                incoming[page_1].append((page_2, share))
+        else:
+            dangling.append(page_2)
+
     # Initializing a dictionary for the PageRank and assigning initial pagerank to each page.
     pagerank = {page_key: 1 / N for page_key in corpus}
 
     while True:
-        # Setting count = 0.
-        count = 0
-
-        # Implementing the PageRank formula.
-        for page_1 in corpus:
-            # Initializing sum_probability.
-            sum_probability = 0
-            for page_2 in corpus:
-                if page_1 in corpus[page_2]:
-                    sum_probability += pagerank[page_2] / len(corpus[page_2])
-            new_pagerank = (1 - damping_factor) / N + damping_factor * sum_probability
-
-            # Finding the highest rank_change in the dictionary.
-            if abs(new_pagerank - pagerank[page_1]) < 0.001:
-                count += 1
-
-            # Passing new_pagerank to pagerank and repeat the process.
-            pagerank[page_1] = new_pagerank
-        
+        # Calculating the rank every page receives from the pages without links.
+        base = (1 - damping_factor) / N + damping_factor * sum(pagerank[page] for page in dangling) / N
+
+        # Implementing the PageRank formula on the previous iteration's ranks.
+        new_pagerank = {
+            page_1: base + damping_factor * sum(pagerank[page_2] * share for page_2, share in incoming[page_1])
+            for page_1 in corpus
+        }
+
+        # Finding the highest rank_change in the dictionary.
+        rank_change = max(abs(new_pagerank[page] - pagerank[page]) for page in corpus)
+
+        # Passing new_pagerank to pagerank and repeat the process.
+        pagerank = new_pagerank
+
         # Checking if each page's pagerank is accurate to within 0.001
-        if count == N:
+        if rank_change < 0.001:
             break
-    
+
     # Calculating the sum of new ranks and normalizing PageRanks so that they add up to 1.
     rank_sum = sum(pagerank.values())
-    for page in pagerank:
-        pagerank[page] /= rank_sum
-    
+    pagerank = {page: rank / rank_sum for page, rank in pagerank.items()}
+
     return pagerank
 
 
@@ -3,13 +3,52 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
-import random
+import functools
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Every cell (i, j) of the board takes two bits of an encoded board, starting
+# at bit 2 * (3 * i + j): the lower one is set for an X, the higher one for an O.
+X_MASK = sum(1 << 2 * cell for cell in range(9))
+
+# The X bits of every row, column and diagonal.
+LINES = tuple(
+    sum(1 << 2 * (3 * i + j) for i, j in line)
+    for line in (
+        ((0, 0), (0, 1), (0, 2)),
+        ((1, 0), (1, 1), (1, 2)),
+        ((2, 0), (2, 1), (2, 2)),
+        ((0, 0), (1, 0), (2, 0)),
+        ((0, 1), (1, 1), (2, 1)),
+        ((0, 2), (1, 2), (2, 2)),
+        ((0, 0), (1, 1), (2, 2)),
+        ((0, 2), (1, 1), (2, 0)),
+    )
+)
+
+# The order in which minimax tries the moves: the center and the corners take
+# part in more lines, so trying them first lets the pruning cut sooner.
+MOVE_ORDER = ((1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1))
+
+
+def encode(board):
+    """
+    Returns the board encoded as an integer.
+    """
+    state = 0
+    shift = 0
+    for row in board:
+        for cell in row:
+            if cell == X:
+                state |= 1 << shift
+            elif cell == O:
+                state |= 2 << shift
+            shift += 2
+
+    return state
+
 
 def initial_state():
     """
@@ -24,14 +63,16 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    # Initialize counters.
-    counter_x = 0
-    counter_o = 0
+    return encoded_player(encode(board))
 
-    # Counting Xs and Os.
-    for row in board:
-        counter_x += row.count(X)
-        counter_o += row.count(O)
+
+def encoded_player(state):
+    """
+    Returns player who has the next turn on an encoded board.
+    """
+    # Counting Xs and Os as the set bits of each player.
+    counter_x = (state & X_MASK).bit_count()
+    counter_o = ((state >> 1) & X_MASK).bit_count()
 
     # Checking if there is a possible move. If amove is possible,
     # since X plays first, everytime berore X's turn: Xs = Os.
@@ -65,9 +106,6 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    # Creating new board as a deepcopy so that the original board does not change.
-    new_board = copy.deepcopy(board)
-
     # Getting indexes.
     i, j = action
 
@@ -78,6 +116,8 @@ def result(board, action):
     # Saving active player's move, only if the spot is EMPTY.
     # If not EMPTY, an exception is raised.
     if not board[i][j]:
+        # Creating new board as a copy of every row so that the original board does not change.
+        new_board = [row[:] for row in board]
         new_board[i][j] = player(board)
         return new_board
     else:
@@ -88,35 +128,24 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    # Initializing sets to chech if the rows or the columns or the diagonals contain the same value.
-    row = set()
-    column = set()
-    diagonal = set()
-    anti_diagonal = set()
-
-    for i in range(3):
-        # Clearing each set of row and column before checking.
-        row.clear()
-        column.clear()
+    return encoded_winner(encode(board))
 
-        # Filling the set with the elements of the diagonal and the anti-diagonal.
-        diagonal.add(board[i][i])
-        anti_diagonal.add(board[i][-(i + 1)])
 
-        # Filling the set with the elements of the row and the column.
-        for j in range(3):
-            row.add(board[i][j])
-            column.add(board[j][i])
-
-        # Checking if a win condition is met in any row, any column, the diagonal or the anti-diagonal.
-        # If a set has a length of 1, then all the elements of the row (or column or diagonal) are equal (and not EMPTY).
-        if len(row) == 1 and board[i][j]:
-            return list(row)[0]
-        elif len(column) == 1 and board[j][i]:
-            return list(column)[0]
+@functools.lru_cache(maxsize=None)
+def encoded_winner(state):
+    """
+    Returns the winner of the game on an encoded board, if there is one.
+    """
+    # Separating the bits of the Xs and the Os.
+    x_bits = state & X_MASK
+    o_bits = (state >> 1) & X_MASK
 
-    if (len(diagonal) == 1 or len(anti_diagonal) == 1) and board[1][1]:
-        return board[1][1]
+    # Checking if all the cells of any row, any column or any diagonal belong to the same player.
+    for line in LINES:
+        if x_bits & line == line:
+            return X
+        if o_bits & line == line:
+            return O
 
     # If there is no winner, then return NONE.
     return None
@@ -126,7 +155,14 @@ def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) or not player(board):
+    return encoded_terminal(encode(board))
+
+
+def encoded_terminal(state):
+    """
+    Returns True if game is over on an encoded board, False otherwise.
+    """
+    if encoded_winner(state) or not encoded_player(state):
         # print("The game has ended! Thanks for playing.")
         return True
     else:
@@ -138,12 +174,20 @@ def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
-        return 1
-    elif winner(board) == O:
-        return -1
-    else:
-        return 0
+    return encoded_utility(encode(board))
+
+
+def encoded_utility(state):
+    """
+    Returns 1 if X has won the game on an encoded board, -1 if O has won, 0 otherwise.
+    """
+    match encoded_winner(state):
+        case "X":
+            return 1
+        case "O":
+            return -1
+        case _:
+            return 0
 
 
 def minimax(board):
@@ -152,41 +196,43 @@ def minimax(board):
     """
     best_action = None
 
-    # Finding the best available action.
-    match player(board):
+    # Encoding the board once, and finding the best available action.
+    state = encode(board)
+    match encoded_player(state):
         case "X":
-            best_action = max_value(board)[1]
+            best_action = max_value(state)[1]
         case "O":
-            best_action = min_value(board)[1]
+            best_action = min_value(state)[1]
 
     return best_action
 
 
-def max_value(board, start_value=10):
+@functools.lru_cache(maxsize=None)
+def max_value(state, start_value=10):
     """
-    Returns the max value for the given state of the board.
+    Returns the max value for the given state of the board, with X to play.
     """
-    # Initializing temporary value, best_action and action_set.
+    # Checking if current state is a terminal state.
+    if encoded_terminal(state):
+        return (encoded_utility(state), None)
+
+    # Initializing temporary value and best_action.
     value = -10
     best_action = None
-    action_set = actions(board)
-
-    # Checking if current state is a terminal state.
-    if terminal(board):
-        return (utility(board), None)
 
-    # If not search for current state's estimated value.
-    while len(action_set) > 0:
-        # Choosing a random action from the set, then removing it.
-        action = random.choice(tuple(action_set))
-        action_set.remove(action)
+    # If not search for current state's estimated value, trying the available actions in MOVE_ORDER.
+    for action in MOVE_ORDER:
+        i, j = action
+        shift = 2 * (3 * i + j)
+        if state >> shift & 3:
+            continue
 
         # This the implementation of A-B Pruning.
         if value >= start_value:
             break
 
-        # Calculating max manually in order to return the best action.
-        min_player = min_value(result(board, action), value)
+        # Calculating max manually in order to return the best action. O plays next.
+        min_player = min_value(state | 1 << shift, value)
         if min_player[0] > value:
             best_action = action
             value = min_player[0]
@@ -194,31 +240,32 @@ def max_value(board, start_value=10):
     return (value, best_action)
 
 
-def min_value(board, start_value=-10):
+@functools.lru_cache(maxsize=None)
+def min_value(state, start_value=-10):
     """
-    Returns the min value for the given state of the board.
+    Returns the min value for the given state of the board, with O to play.
     """
-    # Initializing temporary value, best_action and action_set.
+    # Checking if current state is a terminal state.
+    if encoded_terminal(state):
+        return (encoded_utility(state), None)
+
+    # Initializing temporary value and best_action.
     value = 10
     best_action = None
-    action_set = actions(board)
-
-    # Checking if current state is a terminal state.
-    if terminal(board):
-        return (utility(board), None)
 
-    # If not search for current state's estimated value.
-    while len(action_set) > 0:
-        # Choosing a random action from the set, then removing it.
-        action = random.choice(tuple(action_set))
-        action_set.remove(action)
+    # If not search for current state's estimated value, trying the available actions in MOVE_ORDER.
+    for action in MOVE_ORDER:
+        i, j = action
+        shift = 2 * (3 * i + j)
+        if state >> shift & 3:
+            continue
 
         # This the implementation of A-B Pruning.
         if value <= start_value:
             break
 
-        # Calculating min manually in order to return the best action.
-        max_player = max_value(result(board, action), value)
+        # Calculating min manually in order to return the best action. X plays next.
+        max_player = max_value(state | 2 << shift, value)
         if max_player[0] < value:
             best_action = action
             value = max_player[0]